@@ -3,14 +3,19 @@ Accessible Image Captioner - Main GUI Application
 A production-ready desktop tool for generating image captions with text-to-speech support.
 """
 
+import collections
 import os
 import sys
+import queue
+import tempfile
 import threading
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pyttsx3
-from PIL import Image, ImageTk
+
+# Heavy modules (pyttsx3, PIL, and torch/transformers via utils.captioner)
+# are imported lazily inside the methods that use them, so the window
+# appears immediately instead of after several seconds of imports
 
 # Optional drag-and-drop support
 try:
@@ -19,47 +24,75 @@ try:
 except ImportError:
     DRAG_DROP_AVAILABLE = False
 
+# Optional low-latency audio playback for streamed TTS
+try:
+    import simpleaudio
+    AUDIO_STREAM_AVAILABLE = True
+except ImportError:
+    AUDIO_STREAM_AVAILABLE = False
+
+# Maximum number of decoded thumbnails kept for instant re-display
+_MAX_THUMBS = 32
+
 # Add utils to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from utils.captioner import ImageCaptioner
 
 
 class AccessibleImageCaptionerApp:
     """Main application class for the Accessible Image Captioner."""
     
-    def __init__(self, root):
-        """Initialize the application."""
+    def __init__(self, root, model_name="nlpconnect/vit-gpt2-image-captioning"):
+        """Initialize the application.
+
+        Args:
+            root: Tk root window
+            model_name: Hugging Face captioning model to load; the default
+                is a small checkpoint that loads and captions 2-4x faster
+                than BLIP-base
+        """
         self.root = root
+        self.model_name = model_name
         self.root.title("Accessible Image Captioner")
         self.root.geometry("900x700")
         
         # Application state
         self.current_image_path = None
+        self.current_image_pil = None
         self.current_caption = None
         self.captioner = None
         self.tts_engine = None
+        self.tts_ready = threading.Event()
         self.high_contrast_mode = False
-        
-        # Initialize TTS engine
-        self._init_tts()
-        
+
+        # LRU of (path, mtime) -> (decoded image, PhotoImage) so
+        # re-opening a recent file skips decode and resize entirely
+        self._thumb_cache = collections.OrderedDict()
+
+        # Bumped on every read_aloud; streamed TTS workers carry the value
+        # they started with and stop once it moves on
+        self._tts_generation = 0
+
         # Setup UI
         self._setup_styles()
         self._create_menu()
         self._create_widgets()
         self._setup_keyboard_shortcuts()
-        
-        # Load model in background
+
+        # Load model and TTS engine in background
         self._load_model_async()
-    
+
     def _init_tts(self):
-        """Initialize text-to-speech engine."""
+        """Initialize text-to-speech engine (runs in a background thread)."""
         try:
-            self.tts_engine = pyttsx3.init()
-            self.tts_engine.setProperty('rate', 150)  # Speed
-            self.tts_engine.setProperty('volume', 0.9)  # Volume
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty('rate', 150)  # Speed
+            engine.setProperty('volume', 0.9)  # Volume
+            self.tts_engine = engine
+            self.tts_ready.set()
         except Exception as e:
-            messagebox.showerror("TTS Error", f"Failed to initialize text-to-speech: {str(e)}")
+            self.root.after(0, lambda: messagebox.showerror(
+                "TTS Error", f"Failed to initialize text-to-speech: {str(e)}"))
     
     def _setup_styles(self):
         """Configure application styles and themes."""
@@ -239,7 +272,29 @@ class AccessibleImageCaptionerApp:
             state=tk.DISABLED
         )
         self.export_btn.grid(row=0, column=3, padx=5)
-        
+
+        # Greedy decoding by default - beam search is several times slower
+        # for a marginal alt-text quality gain
+        self.hq_var = tk.BooleanVar(value=False)
+        hq_check = tk.Checkbutton(
+            button_frame,
+            text="High-quality caption (slower)",
+            variable=self.hq_var,
+            font=('Arial', 11)
+        )
+        hq_check.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+
+        # Auto-read is opt-in: an unwanted TTS run serializes behind the
+        # SAPI global lock and delays the next caption's speech
+        self.auto_read_var = tk.BooleanVar(value=False)
+        auto_read_check = tk.Checkbutton(
+            button_frame,
+            text="Read captions aloud automatically",
+            variable=self.auto_read_var,
+            font=('Arial', 11)
+        )
+        auto_read_check.grid(row=1, column=2, columnspan=2, pady=(10, 0))
+
         # Progress bar
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
@@ -266,7 +321,15 @@ class AccessibleImageCaptionerApp:
         """Load the captioning model in a background thread."""
         def load():
             try:
-                self.captioner = ImageCaptioner()
+                # pyttsx3.init can take close to a second on SAPI - do it
+                # here so the window appears immediately
+                self._init_tts()
+                # Importing the captioner pulls in torch/transformers,
+                # which alone takes seconds - keep it off the main thread.
+                # ImageCaptioner warms the model up with a dummy forward
+                # during load, so "ready" means genuinely ready.
+                from utils.captioner import ImageCaptioner
+                self.captioner = ImageCaptioner(model_name=self.model_name)
                 self.root.after(0, self._on_model_loaded)
             except Exception as e:
                 self.root.after(0, lambda: self._on_model_error(str(e)))
@@ -307,39 +370,114 @@ class AccessibleImageCaptionerApp:
             self._load_image(file_path)
     
     def _load_image(self, image_path):
-        """Load and display the selected image."""
+        """Start loading the selected image, reusing cached thumbnails."""
+        self.current_image_path = image_path
+
+        # Never leave the previous image's pixels paired with the new
+        # path: generating during the decode would caption the old image
+        # and poison the cache under the new file's key. Captioning falls
+        # back to the path until the decode lands and re-enables the
+        # button via _show_image.
+        self.current_image_pil = None
+        self.generate_btn.config(state=tk.DISABLED)
+
+        # Key on mtime as well so an edited file isn't served stale
         try:
-            self.current_image_path = image_path
-            
-            # Load and resize image for display
+            key = (image_path, os.path.getmtime(image_path))
+        except OSError:
+            key = None
+
+        if key is not None and key in self._thumb_cache:
+            self._thumb_cache.move_to_end(key)
+            img, photo = self._thumb_cache[key]
+            self._show_image(img, photo, image_path)
+            return
+
+        self.status_label.config(text="Loading image...")
+
+        thread = threading.Thread(
+            target=self._decode_image_worker,
+            args=(image_path, key),
+            daemon=True
+        )
+        thread.start()
+
+    def _decode_image_worker(self, image_path, key):
+        """Decode and thumbnail the image off the Tk main thread."""
+        try:
+            from PIL import Image
+
             img = Image.open(image_path)
-            img.thumbnail((600, 400), Image.Resampling.LANCZOS)
-            
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(img)
-            
-            # Update image label
-            self.image_label.config(image=photo, text="")
-            self.image_label.image = photo  # Keep a reference
-            
-            # Enable generate button
-            if self.captioner:
-                self.generate_btn.config(state=tk.NORMAL)
-            
-            # Update status
-            filename = Path(image_path).name
-            self.status_label.config(text=f"Image loaded: {filename}")
-            
-            # Clear previous caption
-            self.caption_text.config(state=tk.NORMAL)
-            self.caption_text.delete(1.0, tk.END)
-            self.caption_text.config(state=tk.DISABLED)
-            self.current_caption = None
-            self.read_btn.config(state=tk.DISABLED)
-            self.export_btn.config(state=tk.DISABLED)
-            
+
+            # libjpeg can decode JPEGs directly at reduced resolution,
+            # skipping most of the decode work for large photos
+            try:
+                img.draft('RGB', (600, 400))
+            except Exception:
+                pass
+
+            img.load()
+
+            # Keep a captioning-resolution copy, not the full original:
+            # the model input is at most 384px, and draft() can't shrink
+            # PNG/TIFF decodes, so caching full 24MP bitmaps would pin
+            # gigabytes of RAM across 32 LRU entries
+            caption_img = img.copy()
+            caption_img.thumbnail((512, 512), Image.Resampling.BILINEAR)
+
+            # Thumbnail the original in place for display, freeing the
+            # full-resolution pixels. BILINEAR is plenty for a
+            # display-only thumbnail and much faster than LANCZOS
+            display = img
+            display.thumbnail((600, 400), Image.Resampling.BILINEAR)
+
+            self.root.after(0, lambda: self._apply_image(caption_img, display, image_path, key))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load image:\n{str(e)}")
+            self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to load image:\n{str(e)}"))
+
+    def _apply_image(self, img, display, image_path, key):
+        """Cache and display the decoded image; Tk widgets must be touched on the main thread."""
+        from PIL import ImageTk
+
+        # Convert to PhotoImage
+        photo = ImageTk.PhotoImage(display)
+
+        if key is not None:
+            self._thumb_cache[key] = (img, photo)
+            if len(self._thumb_cache) > _MAX_THUMBS:
+                self._thumb_cache.popitem(last=False)
+
+        # Decode threads can finish out of order: if the user has already
+        # selected another image, keep the cache entry but don't clobber
+        # the current selection with a stale result
+        if image_path != self.current_image_path:
+            return
+
+        self._show_image(img, photo, image_path)
+
+    def _show_image(self, img, photo, image_path):
+        """Put the image on screen and reset caption state."""
+        self.current_image_pil = img
+
+        # Update image label
+        self.image_label.config(image=photo, text="")
+        self.image_label.image = photo  # Keep a reference
+
+        # Enable generate button
+        if self.captioner:
+            self.generate_btn.config(state=tk.NORMAL)
+
+        # Update status
+        filename = Path(image_path).name
+        self.status_label.config(text=f"Image loaded: {filename}")
+
+        # Clear previous caption
+        self.caption_text.config(state=tk.NORMAL)
+        self.caption_text.delete(1.0, tk.END)
+        self.caption_text.config(state=tk.DISABLED)
+        self.current_caption = None
+        self.read_btn.config(state=tk.DISABLED)
+        self.export_btn.config(state=tk.DISABLED)
     
     def generate_caption(self):
         """Generate caption for the current image."""
@@ -356,9 +494,18 @@ class AccessibleImageCaptionerApp:
         self.progress.start()
         self.status_label.config(text="Generating caption...")
         
+        num_beams = 4 if self.hq_var.get() else 1
+
         def generate():
             try:
-                caption = self.captioner.generate_caption(self.current_image_path)
+                # The path-based call checks the on-disk caption cache
+                # first; on a miss it reuses the image already decoded
+                # for display instead of re-reading the file
+                caption = self.captioner.generate_caption(
+                    self.current_image_path,
+                    num_beams=num_beams,
+                    image=self.current_image_pil
+                )
                 self.root.after(0, lambda: self._on_caption_generated(caption))
             except Exception as e:
                 self.root.after(0, lambda: self._on_caption_error(str(e)))
@@ -374,20 +521,21 @@ class AccessibleImageCaptionerApp:
         if caption:
             self.current_caption = caption
             
-            # Display caption
-            self.caption_text.config(state=tk.NORMAL)
-            self.caption_text.delete(1.0, tk.END)
-            self.caption_text.insert(1.0, caption)
-            self.caption_text.config(state=tk.DISABLED)
+            # Display caption - replace() swaps the text in one atomic op,
+            # avoiding a redraw of the empty widget between delete and insert
+            self.caption_text.configure(state=tk.NORMAL)
+            self.caption_text.replace('1.0', tk.END, caption)
+            self.caption_text.configure(state=tk.DISABLED)
             
             # Enable read and export buttons
             self.read_btn.config(state=tk.NORMAL)
             self.export_btn.config(state=tk.NORMAL)
             
             self.status_label.config(text="✓ Caption generated successfully!")
-            
-            # Automatically read aloud for accessibility
-            self.read_aloud()
+
+            # Read aloud only when the user opted in
+            if self.auto_read_var.get():
+                self.read_aloud()
         else:
             self._on_caption_error("Failed to generate caption")
     
@@ -404,21 +552,98 @@ class AccessibleImageCaptionerApp:
             messagebox.showwarning("No Caption", "Please generate a caption first.")
             return
         
-        if not self.tts_engine:
-            messagebox.showerror("TTS Error", "Text-to-speech engine is not available.")
+        if not self.tts_ready.is_set() or not self.tts_engine:
+            messagebox.showwarning("TTS Not Ready", "Text-to-speech is still initializing. Please try again in a moment.")
             return
         
-        def speak():
+        # Interrupt any utterance still playing so rapid successive
+        # captions don't queue up behind each other. Bumping the
+        # generation cancels the streamed workers; engine.stop only
+        # covers the fallback path.
+        self._tts_generation += 1
+        try:
+            self.tts_engine.stop()
+        except Exception:
+            pass
+
+        if AUDIO_STREAM_AVAILABLE:
+            try:
+                simpleaudio.stop_all()
+            except Exception:
+                pass
+            self._read_aloud_streamed(self.current_caption, self._tts_generation)
+        else:
+            def speak():
+                try:
+                    self.tts_engine.say(self.current_caption)
+                    self.tts_engine.runAndWait()
+                except Exception as e:
+                    self.root.after(0, lambda: messagebox.showerror("TTS Error", f"Failed to read aloud:\n{str(e)}"))
+
+            thread = threading.Thread(target=speak, daemon=True)
+            thread.start()
+
+        self.status_label.config(text="🔊 Reading caption aloud...")
+
+    def _read_aloud_streamed(self, caption, generation):
+        """Synthesize sentence-by-sentence and stream playback.
+
+        Playback of the first sentence starts as soon as it is rendered,
+        while the remaining sentences keep synthesizing in the background,
+        instead of waiting for the whole caption to be synthesized. Both
+        workers stop as soon as a newer read_aloud bumps the generation
+        counter, so two captions never play over each other.
+        """
+        sentences = [s.strip() for s in caption.split('. ') if s.strip()]
+        audio_queue = queue.Queue()
+
+        def cancelled():
+            return generation != self._tts_generation
+
+        def synth_worker():
+            try:
+                from pyttsx3.engine import Engine
+
+                # pyttsx3.init() returns the process-wide cached engine -
+                # the same instance self.tts_engine keeps alive - and two
+                # concurrent runAndWait() calls on it raise "run loop
+                # already started". Construct a private Engine directly so
+                # this worker never shares a run loop.
+                engine = Engine()
+                engine.setProperty('rate', 150)
+                engine.setProperty('volume', 0.9)
+                for sentence in sentences:
+                    if cancelled():
+                        break
+                    tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+                    tmp.close()
+                    engine.save_to_file(sentence, tmp.name)
+                    engine.runAndWait()
+                    audio_queue.put(tmp.name)
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("TTS Error", f"Failed to synthesize speech:\n{str(e)}"))
+            finally:
+                audio_queue.put(None)  # Signal end of stream
+
+        def play_worker():
             try:
-                self.tts_engine.say(self.current_caption)
-                self.tts_engine.runAndWait()
+                while True:
+                    wav_path = audio_queue.get()
+                    if wav_path is None:
+                        break
+                    try:
+                        # Keep draining so every temp file gets deleted,
+                        # but stop playing once superseded
+                        if not cancelled():
+                            wave_obj = simpleaudio.WaveObject.from_wave_file(wav_path)
+                            wave_obj.play().wait_done()
+                    finally:
+                        os.unlink(wav_path)
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror("TTS Error", f"Failed to read aloud:\n{str(e)}"))
-        
-        thread = threading.Thread(target=speak, daemon=True)
-        thread.start()
-        
-        self.status_label.config(text="🔊 Reading caption aloud...")
+
+        threading.Thread(target=synth_worker, daemon=True).start()
+        threading.Thread(target=play_worker, daemon=True).start()
     
     def export_caption(self):
         """Export the current caption as a text file."""
@@ -474,7 +699,7 @@ class AccessibleImageCaptionerApp:
             "About",
             "Accessible Image Captioner v1.0\n\n"
             "An offline desktop tool for generating image captions with text-to-speech support.\n\n"
-            "Model: nlpconnect/vit-gpt2-image-captioning\n"
+            f"Model: {self.model_name}\n"
             "Powered by Hugging Face Transformers & PyTorch"
         )
     
@@ -15,13 +15,19 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from utils.captioner import ImageCaptioner
 
 
-@pytest.fixture
-def captioner():
-    """Fixture to create an ImageCaptioner instance."""
-    return ImageCaptioner()
+@pytest.fixture(scope="session")
+def captioner(tmp_path_factory):
+    """Fixture to create an ImageCaptioner instance.
 
+    Session-scoped: loading the model takes seconds and hundreds of MB,
+    so all tests share one instance. The caption cache lives in a temp
+    directory so runs never see stale entries from the real user cache.
+    """
+    cache_path = tmp_path_factory.mktemp("cache") / "captions.db"
+    return ImageCaptioner(cache_path=cache_path)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_image():
     """Fixture to create a sample test image."""
     # Create a temporary RGB image
@@ -38,6 +44,25 @@ def sample_image():
     os.unlink(temp_file.name)
 
 
+@pytest.fixture(scope="session")
+def detailed_image():
+    """Fixture to create a non-uniform test image that exercises the model."""
+    # Gradient pattern with enough variance to pass the blank-image check
+    img = Image.new('RGB', (224, 224))
+    pixels = img.load()
+    for x in range(224):
+        for y in range(224):
+            pixels[x, y] = (x % 256, y % 256, (x + y) % 256)
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
+    img.save(temp_file.name)
+    temp_file.close()
+
+    yield temp_file.name
+
+    os.unlink(temp_file.name)
+
+
 def test_captioner_initialization(captioner):
     """Test that the captioner initializes correctly."""
     assert captioner is not None
@@ -78,6 +103,48 @@ def test_invalid_image_path(captioner):
     assert caption is None
 
 
+def test_generate_caption_detailed_image(captioner, detailed_image):
+    """Test caption generation on a non-uniform image (real inference)."""
+    caption = captioner.generate_caption(detailed_image)
+
+    assert caption is not None
+    assert isinstance(caption, str)
+    assert caption != ImageCaptioner.BLANK_CAPTION
+
+
+def test_blank_image_short_circuit(captioner, sample_image):
+    """Test that a uniform image gets the fixed blank caption."""
+    caption = captioner.generate_caption(sample_image)
+    assert caption == ImageCaptioner.BLANK_CAPTION
+
+
+def test_blank_detection_can_be_disabled(captioner, sample_image):
+    """Test that skip_blank=False runs the model even on uniform images."""
+    # Distinct max_length keeps this run's cache entry away from the
+    # default-parameter calls in the other tests
+    caption = captioner.generate_caption(sample_image, max_length=30, skip_blank=False)
+
+    assert caption is not None
+    assert isinstance(caption, str)
+    assert caption != ImageCaptioner.BLANK_CAPTION
+
+
+def test_cache_roundtrip(captioner):
+    """Test that a stored caption comes back on a cache hit."""
+    key = captioner._cache_key(b"image bytes", 50, 1)
+    assert captioner._cache_get(key) is None
+    captioner._cache_put(key, "a test caption")
+    assert captioner._cache_get(key) == "a test caption"
+
+
+def test_cache_key_varies_with_params(captioner):
+    """Test that the cache key covers image bytes and generation params."""
+    base = captioner._cache_key(b"image bytes", 50, 1)
+    assert captioner._cache_key(b"other bytes", 50, 1) != base
+    assert captioner._cache_key(b"image bytes", 20, 1) != base
+    assert captioner._cache_key(b"image bytes", 50, 4) != base
+
+
 def test_batch_generate_captions(captioner, sample_image):
     """Test batch caption generation."""
     image_paths = [sample_image, sample_image]